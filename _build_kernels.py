@@ -0,0 +1,19 @@
+import numpy as np
+from numba.pycc import CC
+
+cc = CC('sf_kernels')
+
+
+@cc.export('informe', 'Tuple((i8[:], f8[:]))(f8[:], i4[:], i4[:], i8)')
+def informe(precios, cantidades, tipo_ids, n_tipos):
+    unidades = np.zeros(n_tipos, np.int64)
+    valores = np.zeros(n_tipos, np.float64)
+    for i in range(len(precios)):
+        t = tipo_ids[i]
+        unidades[t] += cantidades[i]
+        valores[t] += precios[i] * cantidades[i]
+    return unidades, valores
+
+
+if __name__ == '__main__':
+    cc.compile()
@@ -1,7 +1,47 @@
 import csv
+import io
+import itertools
+import re
+import sys
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
+_CUIT_RE = re.compile(r'\d{2}-\d{8}-\d\Z')
+
+_LINEA_ITEM = "- {cantidad:2}u {nombre:<30} x ${precio:>7.2f} = ${subtotal:>9.2f}\n"
+_LINEA_DESCUENTO = "      {descripcion:<40}     - ${descuento:>9.2f}\n"
+_LINEA_TIPO = "  - {tipo:<20}: {unidades:>4}u x $ {promedio:.2f}\n"
+
+
+try:
+    # Compilado por _build_kernels.py; evita la latencia de JIT al arrancar.
+    from sf_kernels import informe as _informe_aot
+
+    def _informe_kernel(precios, cantidades, tipo_ids, n_tipos):
+        # pycc no valida los argumentos: forzar los dtypes de la firma
+        # exportada, o un array promovido reinterpreta memoria y aborta.
+        return _informe_aot(np.ascontiguousarray(precios, dtype=np.float64),
+                            np.ascontiguousarray(cantidades, dtype=np.int32),
+                            np.ascontiguousarray(tipo_ids, dtype=np.int32),
+                            n_tipos)
+except ImportError:
+    from numba import njit
+
+    @njit(cache=True)
+    def _informe_kernel(precios, cantidades, tipo_ids, n_tipos):
+        unidades = np.zeros(n_tipos, np.int64)
+        valores = np.zeros(n_tipos, np.float64)
+        for i in range(len(precios)):
+            t = tipo_ids[i]
+            unidades[t] += cantidades[i]
+            valores[t] += precios[i] * cantidades[i]
+        return unidades, valores
+
 class Producto:
+    __slots__ = ('codigo', 'nombre', 'precio', 'tipo', 'cantidad')
+
     def __init__(self, codigo, nombre, precio, tipo, cantidad):
         self.codigo = codigo
         self.nombre = nombre
@@ -9,170 +49,215 @@ class Producto:
         self.tipo = tipo
         self.cantidad = cantidad
 
-    @property
-    def codigo(self):
-        return self._codigo
-
-    @codigo.setter
-    def codigo(self, value):
-        if len(value) == 4 and value.isdigit():
-            self._codigo = value
-        else:
+    @classmethod
+    def crear(cls, codigo, nombre, precio, tipo, cantidad):
+        if not (len(codigo) == 4 and codigo.isascii() and codigo.isdigit()):
             raise ValueError("El código debe tener 4 dígitos")
-
-    @property
-    def nombre(self):
-        return self._nombre
-
-    @nombre.setter
-    def nombre(self, value):
-        if 1 <= len(value) <= 100:
-            self._nombre = value
-        else:
+        codigo = sys.intern(codigo)
+        if not 1 <= len(nombre) <= 100:
             raise ValueError("El nombre debe tener entre 1 y 100 caracteres")
-
-    @property
-    def precio(self):
-        return self._precio
-
-    @precio.setter
-    def precio(self, value):
-        if 10 <= value <= 10000:
-            self._precio = value
-        else:
+        if not 10 <= precio <= 10000:
             raise ValueError("El precio debe estar entre 10 y 10000")
-
-    @property
-    def tipo(self):
-        return self._tipo
-
-    @tipo.setter
-    def tipo(self, value):
-        if 0 <= len(value) <= 20:
-            self._tipo = value
-        else:
+        if not 0 <= len(tipo) <= 20:
             raise ValueError("El tipo debe tener entre 0 y 20 caracteres")
-
-    @property
-    def cantidad(self):
-        return self._cantidad
-
-    @cantidad.setter
-    def cantidad(self, value):
-        if 0 <= value <= 1000:
-            self._cantidad = value
-        else:
+        if not 0 <= cantidad <= 1000:
             raise ValueError("La cantidad debe estar entre 0 y 1000")
+        return cls(codigo, nombre, precio, tipo, cantidad)
 
     def valorTotal(self):
         return self.precio * self.cantidad
 
+class _ProductoVista(Producto):
+    __slots__ = ('_catalogo', '_fila')
+
+    def __init__(self, catalogo, fila, codigo, nombre, precio, tipo, cantidad):
+        object.__setattr__(self, '_catalogo', None)
+        super().__init__(codigo, nombre, precio, tipo, cantidad)
+        object.__setattr__(self, '_fila', fila)
+        object.__setattr__(self, '_catalogo', catalogo)
+
+    def __setattr__(self, campo, valor):
+        super().__setattr__(campo, valor)
+        if self._catalogo is not None:
+            self._catalogo._actualizar(self._fila, campo, valor)
+
 class Oferta:
-    def __init__(self, descripcion, codigos=[], tipos=[]):
+    def __init__(self, descripcion, codigos=None, tipos=None):
         self.descripcion = descripcion
-        self.codigos = codigos
-        self.tipos = tipos
+        self.codigos = frozenset(codigos or ())
+        self.tipos = frozenset(tipos or ())
 
     def esAplicable(self, producto, cantidad):
         return producto.codigo in self.codigos or producto.tipo in self.tipos
 
     def aplicar(self, producto, cantidad):
-        raise NotImplementedError("Método 'aplicar' debe ser implementado en las subclases")
+        if self.esAplicable(producto, cantidad):
+            return self._aplicarDirecto(producto, cantidad)
+        return 0
+
+    def _aplicarDirecto(self, producto, cantidad):
+        raise NotImplementedError("Método '_aplicarDirecto' debe ser implementado en las subclases")
 
 class OfertaDescuento(Oferta):
     def __init__(self, descuento, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.descuento = descuento
+        self._factor = descuento * 0.01
 
-    def aplicar(self, producto, cantidad):
-        if self.esAplicable(producto, cantidad):
-            return producto.precio * cantidad * (self.descuento / 100)
-        return 0
+    def _aplicarDirecto(self, producto, cantidad):
+        return producto.precio * cantidad * self._factor
 
 class Oferta2x1(Oferta):
-    def aplicar(self, producto, cantidad):
-        if self.esAplicable(producto, cantidad):
-            return producto.precio * (cantidad // 2)
-        return 0
+    def _aplicarDirecto(self, producto, cantidad):
+        return producto.precio * (cantidad // 2)
 
 class Catalogo:
     def __init__(self):
-        self.productos = []
+        self._codigos = np.empty(0, dtype='U4')
+        self._nombres = np.empty(0, dtype=object)
+        self._precios = np.empty(0, dtype=np.float64)
+        self._tipos = np.empty(0, dtype=object)
+        self._cantidades = np.empty(0, dtype=np.int32)
+        self._tipo_ids = np.empty(0, dtype=np.int32)
+        self._indice = {}
+        self._tipo_indice = {}
         self.ofertas = []
+        self._ofertas_por_codigo = {}
+        self._ofertas_por_tipo = {}
+        self._version_ofertas = 0
 
     def leer(self, archivo):
-        self.productos = []
-        with open(archivo, 'r') as f:
-            reader = csv.reader(f)
-            next(reader)  # Skip header
-            for row in reader:
-                codigo, nombre, precio, tipo, cantidad = row
-                self.productos.append(Producto(codigo, nombre, float(precio), tipo, int(cantidad)))
+        df = pd.read_csv(archivo, dtype={'codigo': str, 'nombre': str, 'precio': np.float64,
+                                         'tipo': str, 'cantidad': np.int32},
+                         keep_default_na=False)
+        validaciones = {
+            "El código debe tener 4 dígitos": df['codigo'].str.fullmatch(r'\d{4}'),
+            "El nombre debe tener entre 1 y 100 caracteres": df['nombre'].str.len().between(1, 100),
+            "El precio debe estar entre 10 y 10000": df['precio'].between(10, 10000),
+            "El tipo debe tener entre 0 y 20 caracteres": df['tipo'].str.len().between(0, 20),
+            "La cantidad debe estar entre 0 y 1000": df['cantidad'].between(0, 1000),
+        }
+        for mensaje, valido in validaciones.items():
+            if not valido.all():
+                raise ValueError(f"{mensaje} (filas {list(df.index[~valido])})")
+        self._codigos = df['codigo'].to_numpy(dtype='U4')
+        self._nombres = df['nombre'].to_numpy(dtype=object)
+        self._precios = df['precio'].to_numpy(copy=True)
+        self._tipos = df['tipo'].to_numpy(dtype=object)
+        self._cantidades = df['cantidad'].to_numpy(copy=True)
+        self._indice = {}
+        for i, codigo in enumerate(self._codigos):
+            self._indice.setdefault(sys.intern(str(codigo)), i)
+        self._tipo_indice = {}
+        self._tipo_ids = np.array([self._tipo_indice.setdefault(tipo, len(self._tipo_indice))
+                                   for tipo in self._tipos], dtype=np.int32)
 
     def guardar(self, archivo):
-        with open(archivo, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['codigo', 'nombre', 'precio', 'tipo', 'cantidad'])
-            for p in self.productos:
-                writer.writerow([p.codigo, p.nombre, p.precio, p.tipo, p.cantidad])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['codigo', 'nombre', 'precio', 'tipo', 'cantidad'])
+        writer.writerows(zip(self._codigos, self._nombres, self._precios,
+                             self._tipos, self._cantidades))
+        with open(archivo, 'w', newline='', buffering=1 << 20) as f:
+            f.write(buffer.getvalue())
 
     def agregar(self, producto):
-        self.productos.append(producto)
+        self._codigos = np.append(self._codigos, producto.codigo)
+        self._nombres = np.append(self._nombres, producto.nombre)
+        self._precios = np.append(self._precios, np.float64(producto.precio))
+        self._tipos = np.append(self._tipos, producto.tipo)
+        self._cantidades = np.append(self._cantidades, np.int32(producto.cantidad))
+        tipo_id = self._tipo_indice.setdefault(producto.tipo, len(self._tipo_indice))
+        self._tipo_ids = np.append(self._tipo_ids, np.int32(tipo_id))
+        self._indice.setdefault(producto.codigo, len(self._codigos) - 1)
+
+    @property
+    def productos(self):
+        return list(map(self._producto, range(len(self._codigos))))
+
+    def _producto(self, i):
+        return _ProductoVista(self, i, sys.intern(str(self._codigos[i])), self._nombres[i],
+                              float(self._precios[i]), self._tipos[i], int(self._cantidades[i]))
+
+    def _actualizar(self, fila, campo, valor):
+        if campo == 'codigo':
+            anterior = str(self._codigos[fila])
+            self._codigos[fila] = valor
+            if self._indice.get(anterior) == fila:
+                del self._indice[anterior]
+            self._indice.setdefault(sys.intern(str(valor)), fila)
+        elif campo == 'nombre':
+            self._nombres[fila] = valor
+        elif campo == 'precio':
+            self._precios[fila] = valor
+        elif campo == 'tipo':
+            self._tipos[fila] = valor
+            self._tipo_ids[fila] = self._tipo_indice.setdefault(valor, len(self._tipo_indice))
+        elif campo == 'cantidad':
+            self._cantidades[fila] = valor
 
     def buscar(self, codigo):
-        for p in self.productos:
-            if p.codigo == codigo:
-                return p
-        return None
+        i = self._indice.get(codigo)
+        if i is None:
+            return None
+        return self._producto(i)
 
     def registrarOferta(self, oferta):
+        orden = len(self.ofertas)
         self.ofertas.append(oferta)
+        self._version_ofertas += 1
+        for codigo in oferta.codigos:
+            self._ofertas_por_codigo.setdefault(codigo, (orden, oferta))
+        for tipo in oferta.tipos:
+            self._ofertas_por_tipo.setdefault(tipo, (orden, oferta))
 
     def buscarOferta(self, producto, cantidad):
-        for oferta in self.ofertas:
-            if oferta.esAplicable(producto, cantidad):
-                return oferta
-        return None
+        por_codigo = self._ofertas_por_codigo.get(producto.codigo)
+        por_tipo = self._ofertas_por_tipo.get(producto.tipo)
+        if por_codigo is None:
+            return por_tipo[1] if por_tipo else None
+        if por_tipo is None or por_codigo[0] < por_tipo[0]:
+            return por_codigo[1]
+        return por_tipo[1]
 
     def calcularDescuento(self, producto, cantidad):
         oferta = self.buscarOferta(producto, cantidad)
         if oferta:
-            return oferta.aplicar(producto, cantidad)
+            return oferta._aplicarDirecto(producto, cantidad)
         return 0
 
     @property
     def cantidadProductos(self):
-        return len(self.productos)
+        return len(self._codigos)
 
     @property
     def cantidadUnidades(self):
-        return sum(p.cantidad for p in self.productos)
+        return int(self._cantidades.sum())
 
     @property
     def valorTotal(self):
-        return sum(p.valorTotal() for p in self.productos)
+        return float(np.dot(self._precios, self._cantidades))
 
     def informe(self):
-        tipos = {}
-        for p in self.productos:
-            if p.tipo not in tipos:
-                tipos[p.tipo] = {'unidades': 0, 'valor': 0}
-            tipos[p.tipo]['unidades'] += p.cantidad
-            tipos[p.tipo]['valor'] += p.valorTotal()
-
-        informe = f"INFORME CATALOGO\n"
-        informe += f"Cantidad de productos:   {self.cantidadProductos}\n"
-        informe += f"Cantidad de unidades:    {self.cantidadUnidades}\n"
-        informe += f"Precio promedio:       $ {self.valorTotal / self.cantidadUnidades:.2f}\n"
-        informe += f"Valor total:           $ {self.valorTotal:.2f}\n"
-        informe += "Tipos de productos:\n"
-        for tipo, datos in tipos.items():
-            precio_promedio = datos['valor'] / datos['unidades']
-            informe += f"  - {tipo:<20}: {datos['unidades']:>4}u x $ {precio_promedio:.2f}\n"
-        informe += "Ofertas:\n"
+        tipos = list(self._tipo_indice)
+        unidades, valores = _informe_kernel(self._precios, self._cantidades,
+                                            self._tipo_ids, len(tipos))
+
+        partes = [
+            f"INFORME CATALOGO\n",
+            f"Cantidad de productos:   {self.cantidadProductos}\n",
+            f"Cantidad de unidades:    {self.cantidadUnidades}\n",
+            f"Precio promedio:       $ {self.valorTotal / self.cantidadUnidades:.2f}\n",
+            f"Valor total:           $ {self.valorTotal:.2f}\n",
+            "Tipos de productos:\n",
+        ]
+        for tipo, unidades_tipo, valor_tipo in zip(tipos, unidades, valores):
+            partes.append(_LINEA_TIPO.format(tipo=tipo, unidades=int(unidades_tipo),
+                                             promedio=valor_tipo / unidades_tipo))
+        partes.append("Ofertas:\n")
         for oferta in self.ofertas:
-            informe += f"  - {oferta.descripcion}\n"
-        return informe
+            partes.append(f"  - {oferta.descripcion}\n")
+        return ''.join(partes)
 
 class Cliente:
     def __init__(self, nombre, cuit):
@@ -196,76 +281,97 @@ class Cliente:
 
     @cuit.setter
     def cuit(self, value):
-        if len(value) == 13 and value[2] == '-' and value[11] == '-' and value.replace('-', '').isdigit():
+        if _CUIT_RE.match(value):
             self._cuit = value
         else:
             raise ValueError("El CUIT debe tener el formato XX-XXXXXXXX-X")
 
 class Factura:
-    _ultimo_numero = 0
+    __slots__ = ('catalogo', 'cliente', 'fecha', 'numero',
+                 '_items', '_productos', '_calculo', '_calculo_version')
+    _contador = itertools.count(1)
 
     def __init__(self, catalogo, cliente):
         self.catalogo = catalogo
         self.cliente = cliente
         self.fecha = datetime.now()
-        self.items = []
-        Factura._ultimo_numero += 1
-        self.numero = Factura._ultimo_numero
+        self._items = {}
+        self._productos = {}
+        self._calculo = None
+        self._calculo_version = None
+        self.numero = next(Factura._contador)
 
     @classmethod
     def ultimaFactura(cls, numero):
-        cls._ultimo_numero = numero
+        cls._contador = itertools.count(numero + 1)
 
     @classmethod
     def nuevoNumero(cls):
-        cls._ultimo_numero += 1
-        return cls._ultimo_numero
+        return next(cls._contador)
 
     def agregar(self, producto, cantidad):
-        for item in self.items:
-            if item['producto'] == producto:
-                item['cantidad'] += cantidad
-                return
-        self.items.append({'producto': producto, 'cantidad': cantidad})
+        codigo = producto.codigo
+        self._items[codigo] = self._items.get(codigo, 0) + cantidad
+        self._productos[codigo] = producto
+        self._calculo = None
+
+    def _calcular(self):
+        version = self.catalogo._version_ofertas
+        if self._calculo is None or self._calculo_version != version:
+            lineas = []
+            subtotal = 0
+            descuentos = 0
+            for codigo, cantidad in self._items.items():
+                producto = self._productos[codigo]
+                oferta = self.catalogo.buscarOferta(producto, cantidad)
+                descuento = oferta._aplicarDirecto(producto, cantidad) if oferta else 0
+                lineas.append((producto, cantidad, oferta, descuento))
+                subtotal += producto.precio * cantidad
+                descuentos += descuento
+            self._calculo = (subtotal, descuentos, lineas)
+            self._calculo_version = version
+        return self._calculo
 
     @property
     def cantidadProductos(self):
-        return len(self.items)
+        return len(self._items)
 
     @property
     def cantidadUnidades(self):
-        return sum(item['cantidad'] for item in self.items)
+        return sum(self._items.values())
 
     @property
     def subtotal(self):
-        return sum(item['producto'].precio * item['cantidad'] for item in self.items)
+        return self._calcular()[0]
 
     @property
     def descuentos(self):
-        return sum(self.catalogo.calcularDescuento(item['producto'], item['cantidad']) for item in self.items)
+        return self._calcular()[1]
 
     @property
     def total(self):
-        return self.subtotal - self.descuentos
+        subtotal, descuentos, _ = self._calcular()
+        return subtotal - descuentos
 
     def imprimir(self):
-        factura = f"Factura: {self.numero}\n"
-        factura += f"Fecha  : {self.fecha.strftime('%Y-%m-%d %H:%M:%S')}\n"
-        factura += f"Cliente: {self.cliente.nombre} ({self.cliente.cuit})\n"
-        for item in self.items:
-            producto = item['producto']
-            cantidad = item['cantidad']
-            subtotal = producto.precio * cantidad
-            factura += f"- {cantidad:2}u {producto.nombre:<30} x ${producto.precio:>7.2f} = ${subtotal:>9.2f}\n"
-            descuento = self.catalogo.calcularDescuento(producto, cantidad)
+        subtotal, descuentos, lineas = self._calcular()
+        partes = [
+            f"Factura: {self.numero}\n",
+            f"Fecha  : {self.fecha.isoformat(sep=' ', timespec='seconds')}\n",
+            f"Cliente: {self.cliente.nombre} ({self.cliente.cuit})\n",
+        ]
+        for producto, cantidad, oferta, descuento in lineas:
+            partes.append(_LINEA_ITEM.format(cantidad=cantidad, nombre=producto.nombre,
+                                             precio=producto.precio,
+                                             subtotal=producto.precio * cantidad))
             if descuento > 0:
-                oferta = self.catalogo.buscarOferta(producto, cantidad)
-                factura += f"      {oferta.descripcion:<40}     - ${descuento:>9.2f}\n"
-        factura += f"{'Subtotal:':>54} ${self.subtotal:>9.2f}\n"
-        factura += f"{'Descuentos:':>54} ${self.descuentos:>9.2f}\n"
-        factura += f"{'-'*64}\n"
-        factura += f"{'Total:':>54} ${self.total:>9.2f}"
-        return factura
+                partes.append(_LINEA_DESCUENTO.format(descripcion=oferta.descripcion,
+                                                      descuento=descuento))
+        partes.append(f"{'Subtotal:':>54} ${subtotal:>9.2f}\n")
+        partes.append(f"{'Descuentos:':>54} ${descuentos:>9.2f}\n")
+        partes.append(f"{'-'*64}\n")
+        partes.append(f"{'Total:':>54} ${subtotal - descuentos:>9.2f}")
+        return ''.join(partes)
 # Ejemplo de uso
 if __name__ == "__main__":
     catalogo = Catalogo()